@@ -3,11 +3,17 @@ import json
 import datetime
 from datetime import timezone, timedelta
 import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from firecrawl import FirecrawlApp
 import google.genai as genai
+import requests
 import resend
+from resend.exceptions import ResendError
 import config
 import db
+import planner
+import alerts
+import digest
 
 # Global Lock to prevent multiple simultaneous scrapes
 IS_SCRAPING = False
@@ -30,66 +36,66 @@ def run_scraper_job():
         db.init_db()
         batch = []  # Collect all listings for batch insert
         
-        for condo in config.TARGET_CONDOS:
-            for site in ["propertyguru.com.sg", "99.co"]:
-                print(f"Scraping for {condo} on {site}...")
-                
-                query = f"site:{site} {condo} {config.CRITERIA_DESC}"
+        plan = planner.plan_queries()
+        routed = {}  # condo -> set of URLs found by grouped queries
+        
+        for step in plan:
+            site, condos = step["site"], step["condos"]
+            print(f"Scraping for {', '.join(condos)} on {site}...")
+            
+            try:
+                items = search_items(step["query"], step["limit"])
                 
-                try:
-                    response = firecrawl.search(
-                        query, 
-                        limit=5,
-                        scrape_options={"formats": ["markdown"]}
-                    )
-                    
-                    # Handle response - it's a tuple (result, metadata) or just result
-                    res = response[0] if isinstance(response, tuple) else response
-                    
-                    # Extract items from response
-                    items = []
-                    if isinstance(res, dict):
-                        items = res.get('web', []) or res.get('data', [])
+                if not items:
+                    print(f"No results found for {', '.join(condos)} on {site}")
+                    continue
+            
+                print(f"Processing {len(items)} items for {', '.join(condos)}...")
+
+                for idx, item in enumerate(items):
+                    # Check for errors in metadata first
+                    if isinstance(item, dict):
+                        metadata = item.get('metadata', {}) or {}
+                        if metadata.get('error') or metadata.get('statusCode', 200) >= 400:
+                            print(f"Skipping item {idx+1}: {metadata.get('error', 'Unknown error')}")
+                            continue
+                        
+                        raw_content = item.get('markdown') or item.get('content', '')
+                        url = item.get('url', '')
+                        title = item.get('title') or metadata.get('title', '')
                     else:
-                        items = getattr(res, 'web', []) or getattr(res, 'data', [])
-                    
-                    if not items:
-                        print(f"No results found for {condo} on {site}")
-                        continue
-                
-                    print(f"Processing {len(items)} items for {condo}...")
+                        # Handle Document-like objects
+                        raw_content = getattr(item, 'markdown', '') or getattr(item, 'content', '')
+                        url = getattr(item, 'url', '')
+                        title = getattr(item, 'title', '') or ''
 
-                    for idx, item in enumerate(items):
-                        # Check for errors in metadata first
-                        if isinstance(item, dict):
-                            metadata = item.get('metadata', {})
-                            if metadata.get('error') or metadata.get('statusCode', 200) >= 400:
-                                print(f"Skipping item {idx+1}: {metadata.get('error', 'Unknown error')}")
-                                continue
-                            
-                            raw_content = item.get('markdown') or item.get('content', '')
-                            url = item.get('url', '')
-                        else:
-                            # Handle Document-like objects
-                            raw_content = getattr(item, 'markdown', '') or getattr(item, 'content', '')
-                            url = getattr(item, 'url', '')
+                    if not raw_content or not url:
+                        print(f"Skipping item {idx+1}: missing content or URL")
+                        continue
 
-                        if not raw_content or not url:
-                            print(f"Skipping item {idx+1}: missing content or URL")
-                            continue
+                    # Route the result back to the condo it belongs to
+                    condo = planner.match_condo(url, title, raw_content, condos)
+                    if not condo:
+                        print(f"Skipping item {idx+1}: no target condo matched - {url[:60]}...")
+                        continue
+                    routed.setdefault(condo, set()).add(url)
 
-                        extracted_data = parse_with_llm(raw_content, url, condo)
-                        
-                        if extracted_data and extracted_data.get('listing_id'):
-                            extracted_data['scraped_at'] = datetime.datetime.now(timezone(timedelta(hours=8))).isoformat()
-                            batch.append(extracted_data)
-                            print(f"✓ Extracted: {extracted_data.get('condo_name', 'Unknown')} - {url[:60]}...")
+                    extracted_data = parse_with_llm(raw_content, url, condo)
                     
-                    # Brief pause to respect rate limits
-                    time.sleep(1)
-                            
-                except Exception as e:
-                    print(f"Error scraping {condo} on {site}: {e}")
+                    if extracted_data and extracted_data.get('listing_id'):
+                        extracted_data['scraped_at'] = datetime.datetime.now(timezone(timedelta(hours=8))).isoformat()
+                        batch.append(extracted_data)
+                        print(f"✓ Extracted: {extracted_data.get('condo_name', 'Unknown')} - {url[:60]}...")
+                
+                # Brief pause to respect rate limits
+                time.sleep(config.RATE_LIMIT_DELAY)
+                        
+            except Exception as e:
+                print(f"Error scraping {', '.join(condos)} on {site}: {e}")
+        
+        # Compare grouped coverage against one-query-per-condo searches
+        baseline = run_coverage_audit() if config.COVERAGE_AUDIT else None
+        planner.print_coverage(planner.coverage_report(plan, routed, baseline))
         
         # Batch save all listings
         if batch:
@@ -109,6 +115,37 @@ def run_scraper_job():
         IS_SCRAPING = False
         print(f"--- Job Finished: {datetime.datetime.now()} ---\n")
 
+def search_items(query, limit, scrape=True):
+    """Run a Firecrawl search and return its result items as a list"""
+    # Skip page scraping when only URLs are needed (e.g. coverage audits)
+    options = {"scrape_options": {"formats": ["markdown"]}} if scrape else {}
+    response = firecrawl.search(query, limit=limit, **options)
+    
+    # Handle response - it's a tuple (result, metadata) or just result
+    res = response[0] if isinstance(response, tuple) else response
+    
+    # Extract items from response
+    if isinstance(res, dict):
+        return res.get('web', []) or res.get('data', [])
+    return getattr(res, 'web', []) or getattr(res, 'data', [])
+
+def item_url(item):
+    """Get the URL of a search result item (dict or Document-like object)"""
+    return item.get('url', '') if isinstance(item, dict) else getattr(item, 'url', '')
+
+def run_coverage_audit():
+    """Run one search per condo per site (URLs only) to measure grouped query recall"""
+    baseline = {}
+    for step in planner.plan_queries(group_size=1):
+        condo = step["condos"][0]
+        try:
+            urls = {item_url(item) for item in search_items(step["query"], step["limit"], scrape=False)}
+            baseline.setdefault(condo, set()).update(u for u in urls if u)
+            time.sleep(config.RATE_LIMIT_DELAY)
+        except Exception as e:
+            print(f"Coverage audit error for {condo} on {step['site']}: {e}")
+    return baseline
+
 def start_manual_job_async():
     """Starts the job in a separate thread so it doesn't block the web request"""
     if IS_SCRAPING:
@@ -177,91 +214,97 @@ def parse_with_llm(markdown_text, url, condo_hint):
         print(f"LLM parse error for {url[:60]}: {e}")
         return None
 
+def default_searches():
+    """Catch-all searches for EMAIL_TO, used when no saved searches are configured"""
+    return [{"id": -i, "email": email.strip()} for i, email in enumerate(config.EMAIL_TO, 1) if email.strip()]
+
+class Throttle:
+    """Spaces calls at least 1/rate seconds apart across threads"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_at)
+            self.next_at = slot + self.interval
+        time.sleep(max(0, slot - now))
+
+def is_retryable(error):
+    """Only Resend 429/5xx responses and connection/timeout errors are worth retrying"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, ResendError):
+        try:
+            status = int(error.code)
+        except (TypeError, ValueError):
+            return False
+        return status == 429 or status >= 500
+    return False
+
+def send_chunk(email, chunk, throttle):
+    """Send one digest chunk to one subscriber, retrying 429/5xx with exponential backoff"""
+    for attempt in range(config.SEND_RETRIES + 1):
+        throttle.wait()
+        try:
+            resend.Emails.send({
+                "from": config.EMAIL_FROM,
+                "to": [email],
+                "subject": chunk["subject"],
+                "html": chunk["html"]
+            })
+            return
+        except Exception as e:
+            if attempt == config.SEND_RETRIES or not is_retryable(e):
+                raise
+            delay = 2 ** attempt
+            print(f"Retrying {email} ({chunk['subject']}) in {delay}s: {e}")
+            time.sleep(delay)
+
 def send_digest():
-    """Send email digest of new listings"""
+    """Send each subscriber a digest of new listings matching their saved searches"""
     new_listings = db.get_unsent_listings()
     if not new_listings:
         print("No new listings to email.")
         return
 
-    print(f"📧 Sending email for {len(new_listings)} listings...")
+    searches = db.get_saved_searches() or default_searches()
+    digests = alerts.match_subscribers(searches, new_listings)
     
-    # Generate table rows
-    rows = "".join([
-        f"""<tr style="border-bottom: 1px solid #e5e7eb;">
-            <td style="padding: 12px 16px; font-weight: 600; color: #1e293b;">{l['condo_name']}</td>
-            <td style="padding: 12px 16px; color: #059669; font-weight: 700;">${l['price_sgd']:,}</td>
-            <td style="padding: 12px 16px; color: #64748b; font-size: 14px;">{l['bedrooms']}BR / {l['bathrooms']}BA</td>
-            <td style="padding: 12px 16px; color: #64748b; font-size: 14px;">{l['size_sqft']:,} sqft</td>
-            <td style="padding: 12px 16px; color: #64748b; font-size: 13px;">{l.get('district', 'N/A')}</td>
-            <td style="padding: 12px 16px;">
-                <a href="{l['url']}" style="color: #4f46e5; text-decoration: none; font-weight: 600; font-size: 14px;">
-                    View Listing →
-                </a>
-            </td>
-        </tr>"""
-        for l in new_listings
-    ])
+    # Render size-bounded chunks, skipping listings a previous partial run already delivered
+    jobs = []
+    failed = set()  # Listing IDs that at least one subscriber didn't receive
+    for email, listings in digests.items():
+        delivered = db.get_delivered_ids(email, [l['id'] for l in listings])
+        if delivered is None:
+            # Unknown delivery state: skip rather than risk resending, retry next run
+            print(f"✗ Skipping {email} this run: couldn't read delivery log")
+            failed.update(l['id'] for l in listings)
+            continue
+        pending = [l for l in listings if l['id'] not in delivered]
+        if pending:
+            jobs += [(email, chunk) for chunk in digest.render_chunks(pending)]
     
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background-color: #f8fafc; margin: 0; padding: 20px;">
-    <div style="max-width: 900px; margin: 0 auto; background-color: white; border-radius: 12px; overflow: hidden; box-shadow: 0 4px 6px rgba(0,0,0,0.07);">
-        
-        <!-- Header -->
-        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; color: white;">
-            <h1 style="margin: 0; font-size: 28px; font-weight: 800;">🏠 Property Digest</h1>
-            <p style="margin: 8px 0 0 0; opacity: 0.95; font-size: 15px;">
-                {len(new_listings)} new listing{"s" if len(new_listings) != 1 else ""} found • {datetime.datetime.now(timezone(timedelta(hours=8))).strftime('%B %d, %Y')}
-            </p>
-        </div>
-        
-        <!-- Table -->
-        <div style="overflow-x: auto;">
-            <table style="width: 100%; border-collapse: collapse; text-align: left;">
-                <thead>
-                    <tr style="background-color: #f1f5f9; border-bottom: 2px solid #e2e8f0;">
-                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Condo</th>
-                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Price</th>
-                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Config</th>
-                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Size</th>
-                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">District</th>
-                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Link</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {rows}
-                </tbody>
-            </table>
-        </div>
-        
-        <!-- Footer -->
-        <div style="padding: 24px; background-color: #f8fafc; border-top: 1px solid #e2e8f0; text-align: center;">
-            <p style="margin: 0; color: #64748b; font-size: 13px;">
-                Property Monitor • Automated Daily Digest
-            </p>
-        </div>
-        
-    </div>
-</body>
-</html>"""
+    resend.api_key = config.RESEND_API_KEY
+    print(f"📧 Sending {len(jobs)} emails to {len(digests)} subscribers...")
     
-    try:
-        resend.api_key = config.RESEND_API_KEY
-        resend.Emails.send({
-            "from": config.EMAIL_FROM,
-            "to": config.EMAIL_TO,
-            "subject": f"🏠 New Property Listings ({len(new_listings)})",
-            "html": html_content
-        })
-        
-        db.mark_as_sent([l['id'] for l in new_listings])
-        print("✓ Email sent successfully")
-    except Exception as e:
-        print(f"✗ Email error: {e}")
-        import traceback
-        traceback.print_exc()
+    throttle = Throttle(config.RESEND_RATE_LIMIT)
+    with ThreadPoolExecutor(max_workers=max(1, config.DIGEST_SEND_WORKERS)) as pool:
+        futures = {pool.submit(send_chunk, email, chunk, throttle): (email, chunk) for email, chunk in jobs}
+        for future in as_completed(futures):
+            email, chunk = futures[future]
+            ids = [l['id'] for l in chunk['listings']]
+            try:
+                future.result()
+                # Record per chunk so a retry never resends what already went out
+                db.record_deliveries(email, ids, datetime.datetime.now(timezone(timedelta(hours=8))).isoformat())
+                print(f"✓ Email sent to {email}: {chunk['subject']}")
+            except Exception as e:
+                failed.update(ids)
+                print(f"✗ Email error for {email} ({chunk['subject']}): {e}")
+    
+    # Listings matching no saved search are marked sent too, so they don't pile up
+    db.mark_as_sent([l['id'] for l in new_listings if l['id'] not in failed])
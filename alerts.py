@@ -0,0 +1,185 @@
+import bisect
+import re
+import time
+import config
+from planner import normalize, CondoResolver
+
+INF = float("inf")
+
+# Saved search filter columns: (listing field, min column, max column); the first is indexed
+RANGE_FILTERS = [
+    ("price_sgd", "min_price", "max_price"),
+    ("price_psf", "min_psf", "max_psf"),
+    ("bedrooms", "min_bedrooms", "max_bedrooms"),
+]
+
+def tenure_category(tenure):
+    """Collapse free-text tenure into a small set of comparable categories"""
+    text = (tenure or "").lower()
+    if not text:
+        return None
+    if "free" in text:
+        return "freehold"
+    if "999" in text:
+        return "999-year"
+    if "99" in text:
+        return "99-year"
+    if "lease" in text or re.search(r"\d+\s*-?\s*year", text):
+        return "leasehold"
+    return text.strip()
+
+def tenure_keys(tenure):
+    """Categories a listing's tenure satisfies; 99- and 999-year leases also count as leasehold"""
+    category = tenure_category(tenure)
+    if category in ("99-year", "999-year"):
+        return [category, "leasehold"]
+    return [category]
+
+class RangeIndex:
+    """Centered interval tree answering "which [lo, hi] ranges contain value"
+
+    Each node keeps the ranges that straddle its center sorted by lo and by hi, so a
+    lookup is one bisect and one slice per level: O(log n + matches) regardless of how
+    wide the ranges are. Open ends (None) are treated as -inf/+inf. Results are exact.
+    """
+
+    def __init__(self):
+        self.any = []         # searches with no constraint on this field
+        self.ranges = []      # (lo, hi, id)
+        self.root = None
+
+    def add(self, sid, lo, hi):
+        if lo is None and hi is None:
+            self.any.append(sid)
+        elif lo is not None and hi is not None and lo > hi:
+            return  # Empty range; callers filter these, but build() relies on lo <= hi
+        else:
+            self.ranges.append((-INF if lo is None else lo, INF if hi is None else hi, sid))
+            self.root = None
+
+    @staticmethod
+    def build(ranges):
+        if not ranges:
+            return None
+        # The median endpoint always lies inside some range, so every level makes progress
+        ends = sorted(e for lo, hi, _ in ranges for e in (lo, hi) if abs(e) != INF)
+        center = ends[len(ends) // 2] if ends else 0
+        left = [r for r in ranges if r[1] < center]
+        right = [r for r in ranges if r[0] > center]
+        mid = [r for r in ranges if r[0] <= center <= r[1]]
+
+        by_lo = sorted(mid, key=lambda r: r[0])
+        by_hi = sorted(mid, key=lambda r: -r[1])
+        return (
+            center,
+            [r[0] for r in by_lo], [r[2] for r in by_lo],
+            [-r[1] for r in by_hi], [r[2] for r in by_hi],
+            RangeIndex.build(left), RangeIndex.build(right),
+        )
+
+    def lookup(self, value):
+        ids = list(self.any)
+        if value is None:
+            return ids
+        if self.root is None and self.ranges:
+            self.root = self.build(self.ranges)
+
+        node = self.root
+        while node:
+            center, los, lo_ids, neg_his, hi_ids, left, right = node
+            if value < center:
+                ids += lo_ids[:bisect.bisect_right(los, value)]
+                node = left
+            elif value > center:
+                ids += hi_ids[:bisect.bisect_right(neg_his, -value)]
+                node = right
+            else:
+                ids += lo_ids
+                break
+        return ids
+
+class SearchIndex:
+    """Predicate index over saved searches; matches a listing without scanning every search
+
+    Searches are partitioned by their (condo, tenure) equality keys, with None as the
+    wildcard, and each partition holds a RangeIndex on price. A listing probes at most
+    six partitions and only the remaining PSF/bedroom filters of the hits are checked.
+    """
+
+    def __init__(self, searches):
+        self.searches = {s["id"]: s for s in searches}
+        self.partitions = {}
+        self.checks = {}
+        _, lo_col, hi_col = RANGE_FILTERS[0]
+        # Canonical names that free-text condo names are resolved to
+        self.resolver = CondoResolver(config.TARGET_CONDOS + [s["condo"] for s in searches if s.get("condo")])
+        self.condo_keys = {}
+
+        for sid, s in list(self.searches.items()):
+            # A min > max range matches nothing and would break the interval tree
+            inverted = [lo for _, lo, hi in RANGE_FILTERS
+                        if s.get(lo) is not None and s.get(hi) is not None and s[lo] > s[hi]]
+            if inverted:
+                print(f"Skipping saved search {sid} for {s.get('email')}: {', '.join(inverted)} is above its max")
+                del self.searches[sid]
+                continue
+
+            key = (self.condo_key(s.get("condo")), tenure_category(s.get("tenure")))
+            if key not in self.partitions:
+                self.partitions[key] = RangeIndex()
+            self.partitions[key].add(sid, s.get(lo_col), s.get(hi_col))
+            # Precompile the non-indexed filters; most searches have none to verify
+            self.checks[sid] = [
+                (field, s.get(lo), s.get(hi)) for field, lo, hi in RANGE_FILTERS[1:]
+                if s.get(lo) is not None or s.get(hi) is not None
+            ]
+
+    def condo_key(self, name):
+        """Resolve a condo name like "Flamingo Valley Condo" to its canonical partition key"""
+        if not name:
+            return None
+        if name not in self.condo_keys:
+            self.condo_keys[name] = normalize(self.resolver.resolve(name) or name)
+        return self.condo_keys[name]
+
+    def candidates(self, listing):
+        condo = self.condo_key(listing.get("condo_name"))
+        tenures = tenure_keys(listing.get("tenure"))
+        price = listing.get(RANGE_FILTERS[0][0])
+
+        # Each search lives in exactly one partition, so the lists never overlap
+        ids = []
+        for key in {(c, t) for c in (condo, None) for t in tenures + [None]}:
+            index = self.partitions.get(key)
+            if index:
+                ids += index.lookup(price)
+        return ids
+
+    def match(self, listing):
+        """Return the ids of saved searches the listing satisfies"""
+        # Partition keys and the price index are exact; only the remaining filters need checking
+        return [sid for sid in self.candidates(listing) if not self.checks[sid] or in_ranges(self.checks[sid], listing)]
+
+def in_ranges(checks, listing):
+    """Check a listing against precompiled (field, lo, hi) range filters"""
+    for field, lo, hi in checks:
+        value = listing.get(field)
+        if value is None or (lo is not None and value < lo) or (hi is not None and value > hi):
+            return False
+    return True
+
+def match_subscribers(searches, listings):
+    """Group listings by subscriber email: {email: [listing, ...]} in listing order"""
+    start = time.perf_counter()
+    index = SearchIndex(searches)
+    email_of = {s["id"]: s["email"] for s in searches}
+    digests = {}
+    for listing in listings:
+        for email in {email_of[sid] for sid in index.match(listing)}:
+            if email in digests:
+                digests[email].append(listing)
+            else:
+                digests[email] = [listing]
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Matched {len(listings)} listings against {len(searches)} saved searches in {elapsed:.1f}ms")
+    return digests
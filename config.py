@@ -33,6 +33,20 @@ CRITERIA_DESC = os.getenv("CRITERIA_DESC", f"{MIN_BEDROOMS}+ bedrooms, for sale"
 SEARCH_LIMIT = int(os.getenv("SEARCH_LIMIT", "5"))  # Number of results per search
 RATE_LIMIT_DELAY = float(os.getenv("RATE_LIMIT_DELAY", "1.0"))  # Seconds between requests
 
+# Query Planning
+QUERY_GROUP_SIZE = int(os.getenv("QUERY_GROUP_SIZE", "4"))  # Condos OR-combined per search (1 = one query per condo)
+GROUPED_SEARCH_LIMIT = int(os.getenv("GROUPED_SEARCH_LIMIT", "20"))  # Max results per grouped search
+COVERAGE_AUDIT = os.getenv("COVERAGE_AUDIT", "false").lower() == "true"  # Also run per-condo queries to measure recall
+
+# Digest Configuration
+DIGEST_MAX_BYTES = int(os.getenv("DIGEST_MAX_BYTES", "100000"))  # Max HTML size per email (Gmail clips ~102KB)
+DIGEST_MAX_ROWS = int(os.getenv("DIGEST_MAX_ROWS", "100"))  # Max listings per email
+# Resend allows ~2 requests/second per account by default; sends are throttled to
+# RESEND_RATE_LIMIT across all workers, so more workers than that only adds 429s
+DIGEST_SEND_WORKERS = int(os.getenv("DIGEST_SEND_WORKERS", "2"))  # Concurrent email sends
+RESEND_RATE_LIMIT = float(os.getenv("RESEND_RATE_LIMIT", "2"))  # Max send requests per second
+SEND_RETRIES = int(os.getenv("SEND_RETRIES", "3"))  # Retries per chunk on 429/5xx, with exponential backoff
+
 # Scheduler Configuration (for cron job mode)
 DAILY_RUN_TIME = os.getenv("DAILY_RUN_TIME", "08:00")  # 24-hour format HH:MM
 
@@ -70,6 +84,9 @@ def print_config():
     print(f"Database: {DB_PATH}")
     print(f"Search Limit: {SEARCH_LIMIT} results per query")
     print(f"Rate Limit Delay: {RATE_LIMIT_DELAY}s")
+    print(f"Query Group Size: {QUERY_GROUP_SIZE} condos (max {GROUPED_SEARCH_LIMIT} results)")
+    print(f"Coverage Audit: {COVERAGE_AUDIT}")
+    print(f"Digest Chunks: {DIGEST_MAX_ROWS} listings / {DIGEST_MAX_BYTES:,} bytes, {DIGEST_SEND_WORKERS} workers @ {RESEND_RATE_LIMIT}/s")
     print("="*50 + "\n")
 
 # Auto-validate on import (comment out if you want manual validation)
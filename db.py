@@ -12,6 +12,9 @@ def init_db():
     """Initialize database with schema if not exists"""
     db = get_db()
     
+    init_saved_searches(db)
+    init_deliveries(db)
+    
     if "listings" in db.table_names():
         return
     
@@ -46,6 +49,39 @@ def init_db():
     
     print("✓ Database initialized")
 
+def init_saved_searches(db):
+    """Create the per-subscriber saved searches table if not exists"""
+    if "saved_searches" in db.table_names():
+        return
+    
+    # Null filter columns mean "no constraint"
+    db["saved_searches"].create({
+        "email": str,
+        "name": str,
+        "condo": str,
+        "min_price": int,
+        "max_price": int,
+        "min_psf": int,
+        "max_psf": int,
+        "min_bedrooms": int,
+        "max_bedrooms": int,
+        "tenure": str,
+        "created_at": str
+    }, pk="id", not_null={"email"})
+    
+    db["saved_searches"].create_index(["email"], if_not_exists=True)
+
+def init_deliveries(db):
+    """Create the per-subscriber delivery log table if not exists"""
+    if "deliveries" in db.table_names():
+        return
+    
+    db["deliveries"].create({
+        "email": str,
+        "listing_id": int,  # listings.id
+        "sent_at": str
+    }, pk=("email", "listing_id"))
+
 def save_listing(data):
     """Save or update a single listing"""
     db = get_db()
@@ -105,6 +141,69 @@ def mark_as_sent(listing_ids):
     except Exception as e:
         print(f"Error marking as sent: {e}")
 
+def add_saved_search(data):
+    """Add a saved search for a subscriber, returns its ID"""
+    db = get_db()
+    try:
+        return db["saved_searches"].insert(data, alter=True).last_pk
+    except Exception as e:
+        print(f"Error adding saved search: {e}")
+        return None
+
+def delete_saved_search(search_id):
+    """Delete a saved search by its ID"""
+    db = get_db()
+    try:
+        db["saved_searches"].delete(search_id)
+    except Exception as e:
+        print(f"Error deleting saved search: {e}")
+
+def get_saved_searches():
+    """Get all saved searches ordered by subscriber"""
+    db = get_db()
+    try:
+        return list(db["saved_searches"].rows_where(order_by="email, id"))
+    except Exception as e:
+        print(f"Error fetching saved searches: {e}")
+        return []
+
+def get_delivered_ids(email, listing_ids, batch_size=500):
+    """Get the subset of listing IDs already delivered to a subscriber, or None on error"""
+    if not listing_ids:
+        return set()
+    
+    db = get_db()
+    try:
+        delivered = set()
+        # Batch the IN list to stay under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
+        for start in range(0, len(listing_ids), batch_size):
+            batch = listing_ids[start:start + batch_size]
+            placeholders = ",".join("?" * len(batch))
+            rows = db.execute(
+                f"SELECT listing_id FROM deliveries WHERE email = ? AND listing_id IN ({placeholders})",
+                [email, *batch]
+            ).fetchall()
+            delivered.update(r[0] for r in rows)
+        return delivered
+    except Exception as e:
+        # None, not an empty set: callers must not mistake a failed lookup for "nothing sent"
+        print(f"Error fetching deliveries for {email}: {e}")
+        return None
+
+def record_deliveries(email, listing_ids, sent_at):
+    """Log listings as delivered to a subscriber"""
+    if not listing_ids:
+        return
+    
+    db = get_db()
+    try:
+        db["deliveries"].upsert_all(
+            [{"email": email, "listing_id": lid, "sent_at": sent_at} for lid in listing_ids],
+            pk=("email", "listing_id")
+        )
+    except Exception as e:
+        print(f"Error recording deliveries: {e}")
+
 def get_all_listings(limit=100):
     """Get all listings ordered by most recent first"""
     db = get_db()
@@ -0,0 +1,175 @@
+import datetime
+from datetime import timezone, timedelta
+from html import escape
+from string import Template
+import config
+from planner import normalize, CondoResolver
+
+def compile_template(text):
+    """Split a $placeholder template once into literal parts and field names"""
+    parts, names, pos = [], [], 0
+    for m in Template.pattern.finditer(text):
+        name = m.group("named") or m.group("braced")
+        if name is None:
+            raise ValueError(f"Unsupported template syntax: {m.group()!r}")
+        parts.append(text[pos:m.start()])
+        names.append(name)
+        pos = m.end()
+    parts.append(text[pos:])
+    return parts, names
+
+def fill(compiled, **values):
+    """Render a compiled template by joining its literal parts with the values, no regex"""
+    parts, names = compiled
+    out = [parts[0]]
+    for name, part in zip(names, parts[1:]):
+        out.append(str(values[name]))
+        out.append(part)
+    return "".join(out)
+
+# Templates are split into literal parts once at import; rendering a row only joins strings
+
+PAGE = compile_template("""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background-color: #f8fafc; margin: 0; padding: 20px;">
+    <div style="max-width: 900px; margin: 0 auto; background-color: white; border-radius: 12px; overflow: hidden; box-shadow: 0 4px 6px rgba(0,0,0,0.07);">
+
+        <!-- Header -->
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; color: white;">
+            <h1 style="margin: 0; font-size: 28px; font-weight: 800;">🏠 Property Digest</h1>
+            <p style="margin: 8px 0 0 0; opacity: 0.95; font-size: 15px;">
+                $summary • $date
+            </p>
+        </div>
+
+        <!-- Table -->
+        <div style="overflow-x: auto;">
+            <table style="width: 100%; border-collapse: collapse; text-align: left;">
+                <thead>
+                    <tr style="background-color: #f1f5f9; border-bottom: 2px solid #e2e8f0;">
+                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Price</th>
+                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Config</th>
+                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Size</th>
+                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">District</th>
+                        <th style="padding: 14px 16px; font-size: 12px; font-weight: 700; text-transform: uppercase; letter-spacing: 0.5px; color: #475569;">Link</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    $rows
+                </tbody>
+            </table>
+        </div>
+
+        <!-- Footer -->
+        <div style="padding: 24px; background-color: #f8fafc; border-top: 1px solid #e2e8f0; text-align: center;">
+            <p style="margin: 0; color: #64748b; font-size: 13px;">
+                Property Monitor • Automated Daily Digest
+            </p>
+        </div>
+
+    </div>
+</body>
+</html>""")
+
+GROUP = compile_template("""<tr style="background-color: #f8fafc; border-bottom: 1px solid #e5e7eb;">
+            <td colspan="5" style="padding: 12px 16px; font-weight: 700; color: #1e293b;">$condo</td>
+        </tr>""")
+
+ROW = compile_template("""<tr style="border-bottom: 1px solid #e5e7eb;">
+            <td style="padding: 12px 16px; color: #059669; font-weight: 700;">$price</td>
+            <td style="padding: 12px 16px; color: #64748b; font-size: 14px;">${bedrooms}BR / ${bathrooms}BA</td>
+            <td style="padding: 12px 16px; color: #64748b; font-size: 14px;">$size sqft</td>
+            <td style="padding: 12px 16px; color: #64748b; font-size: 13px;">$district</td>
+            <td style="padding: 12px 16px;">
+                <a href="$url" style="color: #4f46e5; text-decoration: none; font-weight: 600; font-size: 14px;">
+                    View Listing →
+                </a>
+            </td>
+        </tr>""")
+
+# Size of the page shell without rows, reserved in every chunk's byte budget
+SHELL_BYTES = len(fill(PAGE, summary="", date="", rows="").encode()) + 200
+
+def render_row(l):
+    """Render one listing as a table row"""
+    return fill(ROW,
+        price=f"${l['price_sgd']:,}" if l.get('price_sgd') else "-",
+        bedrooms=l.get('bedrooms') or "-",
+        bathrooms=l.get('bathrooms') or "-",
+        size=f"{l['size_sqft']:,}" if l.get('size_sqft') else "-",
+        district=escape(str(l.get('district') or 'N/A')),
+        url=escape(l.get('url') or '', quote=True),
+    )
+
+def render_group(condo, continued=False):
+    """Render the condo header row that starts each group"""
+    return fill(GROUP, condo=escape(condo) + (" (cont.)" if continued else ""))
+
+def build_chunks(listings, max_bytes=None, max_rows=None):
+    """Group listings by condo and split them into size-bounded chunks
+
+    Returns a list of {"listings": [...], "rows": html} where each chunk's rendered
+    page stays under max_bytes (unless a single row alone exceeds it) and max_rows.
+    """
+    max_bytes = max_bytes or config.DIGEST_MAX_BYTES
+    max_rows = max_rows or config.DIGEST_MAX_ROWS
+    budget = max_bytes - SHELL_BYTES
+
+    # Group under the canonical condo name so spelling variants share one header
+    resolver = CondoResolver(config.TARGET_CONDOS)
+    groups, names = {}, {}
+    for l in listings:
+        raw = l.get('condo_name') or "Unknown"
+        name = resolver.resolve(raw) or raw
+        key = normalize(name)
+        names.setdefault(key, name)
+        groups.setdefault(key, []).append(l)
+
+    chunks = []
+    current, parts, size = [], [], 0
+    for key, items in groups.items():
+        condo = names[key]
+        open_group = False
+        for l in items:
+            row = render_row(l)
+            cost = len(row.encode())
+            header = "" if open_group else render_group(condo)
+
+            if current and (size + cost + len(header.encode()) > budget or len(current) >= max_rows):
+                chunks.append({"listings": current, "rows": "".join(parts)})
+                current, parts, size = [], [], 0
+                # Repeat the condo header when a group spills into the next chunk
+                header = render_group(condo, continued=open_group)
+
+            if header:
+                parts.append(header)
+                size += len(header.encode())
+            parts.append(row)
+            size += cost
+            current.append(l)
+            open_group = True
+
+    if current:
+        chunks.append({"listings": current, "rows": "".join(parts)})
+    return chunks
+
+def render_chunks(listings, max_bytes=None, max_rows=None):
+    """Render listings into a list of {"listings", "subject", "html"} digest emails"""
+    chunks = build_chunks(listings, max_bytes, max_rows)
+    date = datetime.datetime.now(timezone(timedelta(hours=8))).strftime('%B %d, %Y')
+    total = len(listings)
+
+    for i, chunk in enumerate(chunks, 1):
+        count = len(chunk["listings"])
+        summary = f"{total} new listing{'s' if total != 1 else ''} found"
+        subject = f"🏠 New Property Listings ({total})"
+        if len(chunks) > 1:
+            summary += f" • part {i} of {len(chunks)} ({count} here)"
+            subject += f" [{i}/{len(chunks)}]"
+        chunk["subject"] = subject
+        chunk["html"] = fill(PAGE, summary=summary, date=date, rows=chunk.pop("rows"))
+    return chunks
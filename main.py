@@ -84,6 +84,11 @@ def get():
                                 onclick="this.innerText='⏳ Scraping...'; this.classList.add('scraping'); setTimeout(() => location.reload(), 60000);"
                             )
                         ),
+                        A(
+                            "🔔 Searches",
+                            href="/searches",
+                            cls="bg-white text-slate-700 px-6 py-3 rounded-lg font-bold hover:bg-slate-100 transition-all shadow-lg hover:shadow-xl border border-gray-200"
+                        ),
                         A(
                             "🔧 Config",
                             href="/config",
@@ -198,6 +203,140 @@ def get():
         )
     )
 
+def search_filters(s):
+    """Describe a saved search's filters in one line"""
+    def span(lo, hi, fmt):
+        if lo is None and hi is None:
+            return None
+        return f"{fmt(lo) if lo is not None else 'any'} – {fmt(hi) if hi is not None else 'any'}"
+    
+    parts = [
+        s.get('condo'),
+        span(s.get('min_price'), s.get('max_price'), format_curr),
+        span(s.get('min_psf'), s.get('max_psf'), lambda v: f"{format_curr(v)} psf"),
+        span(s.get('min_bedrooms'), s.get('max_bedrooms'), lambda v: f"{v}BR"),
+        s.get('tenure'),
+    ]
+    return " • ".join(p for p in parts if p) or "All new listings"
+
+# Range filters on the saved search form: (label, min field, max field)
+SEARCH_RANGES = [
+    ("Price", "min_price", "max_price"),
+    ("PSF", "min_psf", "max_psf"),
+    ("Bedrooms", "min_bedrooms", "max_bedrooms"),
+]
+
+def filter_input(name, placeholder, form, type="text", **kw):
+    return Input(name=name, placeholder=placeholder, type=type, value=form.get(name) or "",
+                 cls="border border-gray-300 rounded-lg px-3 py-2 text-sm w-full", **kw)
+
+def parse_bound(raw, label):
+    """Parse a form number like "1,500,000"; empty means no constraint, anything invalid raises"""
+    text = (raw or "").strip().replace(",", "").replace("$", "").replace(" ", "")
+    if not text:
+        return None
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError(f"{label}: '{raw}' is not a number")
+    if not value.is_integer() or value < 0:
+        raise ValueError(f"{label}: '{raw}' must be a whole number of 0 or more")
+    return int(value)
+
+def parse_search_form(form):
+    """Validate the saved search form into a db row, raising ValueError with a message"""
+    data = {k: (form.get(k) or "").strip() or None for k in ("email", "name", "condo", "tenure")}
+    if not data["email"]:
+        raise ValueError("Subscriber email is required")
+    
+    for label, lo_key, hi_key in SEARCH_RANGES:
+        lo = parse_bound(form.get(lo_key), f"Min {label}")
+        hi = parse_bound(form.get(hi_key), f"Max {label}")
+        if lo is not None and hi is not None and lo > hi:
+            raise ValueError(f"{label}: min {lo:,} is greater than max {hi:,}")
+        data[lo_key], data[hi_key] = lo, hi
+    return data
+
+def searches_page(error=None, form=None):
+    """Saved searches page, optionally re-showing a rejected form with its error"""
+    form = form or {}
+    db.init_db()
+    searches = db.get_saved_searches()
+    
+    return Body(cls="bg-gradient-to-br from-slate-50 to-slate-100 min-h-screen font-sans text-gray-900")(
+        Div(cls="max-w-[1200px] mx-auto p-4 md:p-8")(
+            Header(cls="mb-8 flex justify-between items-center")(
+                H1("🔔 Saved Searches", cls="text-4xl font-extrabold tracking-tight text-slate-800"),
+                A("← Listings", href="/", cls="text-indigo-600 font-bold hover:underline")
+            ),
+            
+            # Validation Error
+            (Div(error, cls="bg-red-50 border border-red-200 text-red-700 rounded-lg px-4 py-3 mb-4 text-sm font-bold") if error else ""),
+            
+            # Add Search Form
+            Form(method="post", action="/searches", cls="bg-white rounded-2xl shadow-xl p-6 mb-8 grid grid-cols-2 md:grid-cols-4 gap-3")(
+                filter_input("email", "Subscriber email", form, type="email", required=True),
+                filter_input("name", "Search name", form),
+                filter_input("condo", "Condo (any)", form),
+                filter_input("tenure", "Tenure (any)", form),
+                *[filter_input(key, f"{bound} {label}", form, inputmode="numeric")
+                  for label, lo_key, hi_key in SEARCH_RANGES
+                  for bound, key in (("Min", lo_key), ("Max", hi_key))],
+                Button("Add Search", type="submit", cls="col-span-2 bg-indigo-600 text-white px-6 py-2 rounded-lg font-bold hover:bg-indigo-700")
+            ),
+            
+            # Searches Table
+            (
+                P(f"No saved searches yet - digests go to all of: {', '.join(config.EMAIL_TO) or 'nobody'}", cls="text-slate-500")
+                if not searches else
+                Div(cls="bg-white shadow-2xl rounded-2xl overflow-hidden border border-gray-200")(
+                    Table(cls="w-full text-left border-collapse")(
+                        Thead(cls="bg-slate-800 text-slate-200 text-xs uppercase tracking-wider font-semibold")(
+                            Tr(Th("Subscriber", cls="p-4"), Th("Name", cls="p-4"), Th("Filters", cls="p-4"), Th("", cls="p-4"))
+                        ),
+                        Tbody(
+                            *[Tr(cls="border-b border-gray-100")(
+                                Td(s['email'], cls="p-4 text-sm font-bold"),
+                                Td(s.get('name') or "-", cls="p-4 text-sm"),
+                                Td(search_filters(s), cls="p-4 text-sm text-slate-600"),
+                                Td(cls="p-4 text-right")(
+                                    Form(method="post", action=f"/searches/{s['id']}/delete")(
+                                        Button("Delete", type="submit", cls="text-red-600 hover:text-red-800 font-bold text-xs")
+                                    )
+                                )
+                            ) for s in searches]
+                        )
+                    )
+                )
+            )
+        )
+    )
+
+@rt("/searches")
+def get():
+    """Saved searches per subscriber"""
+    return searches_page()
+
+@rt("/searches")
+async def post(req):
+    """Add a saved search"""
+    form = await req.form()
+    try:
+        data = parse_search_form(form)
+    except ValueError as e:
+        # Never save a looser search than the subscriber asked for
+        return searches_page(error=str(e), form=form)
+    
+    data["created_at"] = datetime.now(timezone(timedelta(hours=8))).isoformat()
+    db.add_saved_search(data)
+    return RedirectResponse("/searches", status_code=303)
+
+@rt("/searches/{search_id}/delete")
+def post(search_id: int):
+    """Delete a saved search"""
+    db.delete_saved_search(search_id)
+    return RedirectResponse("/searches", status_code=303)
+
 @rt("/trigger")
 def post():
     """Trigger manual scrape job"""
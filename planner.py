@@ -0,0 +1,126 @@
+import re
+import config
+
+SITES = ["propertyguru.com.sg", "99.co"]
+
+def normalize(text):
+    """Lowercase and collapse punctuation/whitespace so names, slugs and titles compare equal"""
+    return " " + re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).strip() + " "
+
+def plan_queries(condos=None, sites=None, group_size=None):
+    """Group condos into OR-joined search queries, one set per site"""
+    condos = condos if condos is not None else config.TARGET_CONDOS
+    sites = sites if sites is not None else SITES
+    group_size = max(1, group_size or config.QUERY_GROUP_SIZE)
+
+    plan = []
+    for site in sites:
+        for start in range(0, len(condos), group_size):
+            group = condos[start:start + group_size]
+            if len(group) == 1:
+                names = group[0]
+            else:
+                names = "(" + " OR ".join(f'"{c}"' for c in group) + ")"
+            plan.append({
+                "site": site,
+                "condos": group,
+                "query": f"site:{site} {names} {config.CRITERIA_DESC}",
+                # Scale the page size with the group so each condo keeps roughly its per-query share
+                "limit": min(config.SEARCH_LIMIT * len(group), config.GROUPED_SEARCH_LIMIT),
+            })
+    return plan
+
+def find_condo(text, condos):
+    """Return the condo whose name appears in text, or None"""
+    haystack = normalize(text)
+    hits = [c for c in condos if normalize(c) in haystack]
+    # Prefer the longest name so "Flamingo Valley" beats a shorter overlapping name
+    return max(hits, key=len) if hits else None
+
+class CondoResolver:
+    """Resolve free-text names like "Flamingo Valley Condo" to canonical condo names
+
+    Gives the same answer as find_condo, but looks up each contiguous word run of the
+    name in a dict of normalized names, so cost depends on the name's length rather
+    than the number of condos. Results are memoized per raw name.
+    """
+
+    def __init__(self, condos):
+        self.by_key = {}
+        for c in condos:
+            key = normalize(c).strip()
+            # Spellings sharing a key keep the longest, as find_condo would prefer
+            if key and len(c) > len(self.by_key.get(key, "")):
+                self.by_key[key] = c
+        self.cache = {}
+
+    def resolve(self, name):
+        """Return the canonical condo contained in name, or None"""
+        if name not in self.cache:
+            words = normalize(name).split()
+            hits = [
+                self.by_key[key]
+                for i in range(len(words)) for j in range(i + 1, len(words) + 1)
+                if (key := " ".join(words[i:j])) in self.by_key
+            ]
+            self.cache[name] = max(hits, key=len) if hits else None
+        return self.cache[name]
+
+def match_condo(url, title, content, condos):
+    """Route a search result to one of the condos it was fetched for, or None"""
+    if len(condos) == 1:
+        return condos[0]
+
+    # URL slug and title are the strongest signals; body text often mentions nearby developments
+    for text in (url, title, (content or "")[:2000]):
+        condo = find_condo(text, condos)
+        if condo:
+            return condo
+    return None
+
+def coverage_report(plan, routed, baseline=None):
+    """Summarize call count and per-condo hits for grouped queries vs per-condo queries
+
+    routed:   {condo: set(urls)} found by the grouped plan
+    baseline: optional {condo: set(urls)} found by one-query-per-condo searches
+    """
+    condos = [c for step in plan for c in step["condos"]]
+    report = {
+        "grouped_calls": len(plan),
+        "per_condo_calls": len(condos),
+        "by_condo": {},
+        "missed_condos": [],
+    }
+
+    for condo in dict.fromkeys(condos):
+        found = routed.get(condo, set())
+        entry = {"grouped": len(found)}
+        if baseline is not None:
+            expected = baseline.get(condo, set())
+            entry["per_condo"] = len(expected)
+            entry["recall"] = round(len(found & expected) / len(expected), 2) if expected else None
+        report["by_condo"][condo] = entry
+        if not found:
+            report["missed_condos"].append(condo)
+
+    if baseline is not None:
+        expected_all = set().union(*baseline.values()) if baseline else set()
+        found_all = set().union(*routed.values()) if routed else set()
+        report["recall"] = round(len(found_all & expected_all) / len(expected_all), 2) if expected_all else None
+
+    return report
+
+def print_coverage(report):
+    """Print a coverage report produced by coverage_report()"""
+    print(f"Query plan: {report['grouped_calls']} grouped calls vs "
+          f"{report['per_condo_calls']} per-condo calls")
+    for condo, entry in report["by_condo"].items():
+        line = f"  {condo}: {entry['grouped']} grouped"
+        if "per_condo" in entry:
+            line += f", {entry['per_condo']} per-condo, recall {entry['recall']}"
+        print(line)
+    if "recall" in report:
+        print(f"  Overall recall vs per-condo queries: {report['recall']}")
+    if report["missed_condos"]:
+        print(f"  No grouped results for: {', '.join(report['missed_condos'])} "
+              f"(consider lowering QUERY_GROUP_SIZE)")